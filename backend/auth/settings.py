@@ -1,11 +1,17 @@
 import os, uuid
 from pathlib import Path
 from datetime import timedelta
-from dotenv import load_dotenv
-
-load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Only import python-dotenv when there is a .env to read; deployed workers get
+# their environment from the platform. Searched upward from this file, like
+# load_dotenv() without arguments.
+for dotenv_path in (Path(__file__).resolve().parent / ".env", BASE_DIR / ".env", BASE_DIR.parent / ".env"):
+    if dotenv_path.is_file():
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path)
+        break
 SECRET_KEY = os.getenv("SECRET_KEY")
 DEBUG = os.getenv("DEBUG") == "True"
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "").split(",") + ["2FAuthentication.railway.app"]
@@ -41,7 +47,9 @@ AUTH_USER_MODEL = "auth_app.User"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MIDDLEWARE = [
+    "auth_app.middleware.RequestProfilingMiddleware",  # no-op unless REQUEST_PROFILING=True
     "corsheaders.middleware.CorsMiddleware",
+    "auth_app.middleware.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,6 +84,17 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated hosts, same credentials as the primary.
+REPLICA_DATABASES = []
+for index, host in enumerate(filter(None, os.getenv("MYSQL_REPLICA_HOSTS", "").split(","))):
+    alias = f"replica{index + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["auth_app.routers.PrimaryReplicaRouter"]
+# Seconds a client keeps reading from the primary after it writes.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 15))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -101,3 +120,35 @@ CORS_ALLOW_ALL_ORIGINS = False
 # Redis
 # REDIS_HOST = os.getenv("REDIS_HOST")
 # REDIS_PORT = os.getenv("REDIS_PORT")
+
+# Short-lived auth state (WebAuthn challenges). Use Redis when several
+# workers serve the app, otherwise a challenge may land on another process.
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
+        if os.getenv("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Background cleanup (manage.py cleanup)
+CLEANUP_INTERVAL = int(os.getenv("CLEANUP_INTERVAL", 3600))            # seconds between runs of a job
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", 500))         # rows per DELETE
+CLEANUP_BATCH_SLEEP = float(os.getenv("CLEANUP_BATCH_SLEEP", 0.2))     # seconds between batches
+CLEANUP_LOCK_WAIT_TIMEOUT = int(os.getenv("CLEANUP_LOCK_WAIT_TIMEOUT", 2))  # MySQL only
+ADMIN_LOG_RETENTION_DAYS = int(os.getenv("ADMIN_LOG_RETENTION_DAYS", 365))
+
+# Request profiling (auth_app.middleware.RequestProfilingMiddleware, manage.py profiles)
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING") == "True"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.01))   # fraction of requests
+PROFILE_PATHS = [p for p in os.getenv("PROFILE_PATHS", "").split(",") if p]  # always profiled
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")                            # header value that forces profiling
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))                     # slowest profiles kept
+
+# WebAuthn / passkeys
+WEBAUTHN_RP_ID = os.getenv("WEBAUTHN_RP_ID", "localhost")
+WEBAUTHN_RP_NAME = os.getenv("WEBAUTHN_RP_NAME", "MFA Auth")
+WEBAUTHN_ORIGINS = [o for o in os.getenv("WEBAUTHN_ORIGINS", ",".join(CORS_ALLOWED_ORIGINS)).split(",") if o]
+WEBAUTHN_CHALLENGE_TTL = int(os.getenv("WEBAUTHN_CHALLENGE_TTL", 120))
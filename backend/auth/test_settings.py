@@ -0,0 +1,23 @@
+# Settings for the test suite: two SQLite databases stand in for the MySQL
+# primary and a read replica.
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = "test-secret-key-not-for-production-use"
+DEBUG = False
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_primary.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_replica.sqlite3",
+    },
+}
+REPLICA_DATABASES = ["replica"]
+# The suite runs in one process, so the local-memory cache is enough for replica pins.
+SILENCED_SYSTEM_CHECKS = ["auth_app.W001"]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
@@ -1,9 +1,8 @@
 import os
 from django.core.wsgi import get_wsgi_application
-from dotenv import load_dotenv
 
-# Load environment variables from .env
-load_dotenv()
+# Environment variables from .env are loaded by auth.settings, only when the
+# file exists.
 
 # Set default Django settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "auth.settings")
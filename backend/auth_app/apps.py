@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+
+
+class AuthAppConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "auth_app"
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import post_delete, post_save
+        from .checks import check_replica_pin_cache
+        from .routers import mark_primary_write
+
+        checks.register(check_replica_pin_cache, checks.Tags.caches)
+
+        post_save.connect(mark_primary_write, dispatch_uid="auth_app.pin_primary_on_save")
+        # Deletes only pin for this app's models: a global post_delete
+        # receiver would disable Django's fast-delete path for every model
+        # (e.g. batched session purges in auth_app.cleanup).
+        for model in self.get_models():
+            post_delete.connect(
+                mark_primary_write, sender=model,
+                dispatch_uid=f"auth_app.pin_primary_on_delete.{model._meta.model_name}",
+            )
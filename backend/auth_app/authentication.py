@@ -2,7 +2,7 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from django.conf import settings
-import jwt
+from . import routers
 from .models import User
 import os
 
@@ -20,6 +20,8 @@ class CustomJWTAuthentication(BaseAuthentication):
         if not auth_header or not auth_header.startswith(f"{self.keyword} "):
             return None  # No credentials; DRF moves to next auth class
 
+        import jwt  # deferred: PyJWT loads cryptography when it is installed
+
         token = auth_header.split(" ")[1]
         try:
             payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
@@ -31,6 +33,7 @@ class CustomJWTAuthentication(BaseAuthentication):
         if payload.get("type") != "access":
             raise exceptions.AuthenticationFailed("Invalid token type")
 
+        routers.pin_if_user_pinned(payload["user_id"])
         try:
             user = User.objects.get(id=payload["user_id"], email=payload["email"])
         except User.DoesNotExist:
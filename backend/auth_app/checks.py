@@ -0,0 +1,22 @@
+# backend/auth_app/checks.py
+from django.conf import settings
+from django.core.checks import Warning
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Read-your-writes pins live in the cache, so replicas need one shared by all workers."""
+    if not getattr(settings, "REPLICA_DATABASES", []):
+        return []
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "Read replicas are configured but the default cache is process-local, so a "
+        "write pinned in one worker is not seen by the others.",
+        hint="Set REDIS_URL (or another shared cache) when MYSQL_REPLICA_HOSTS is set.",
+        id="auth_app.W001",
+    )]
@@ -0,0 +1,140 @@
+# backend/auth_app/cleanup.py
+"""
+Periodic purges of expired rows, run by `manage.py cleanup`.
+
+Each job deletes in small batches: an indexed SELECT for up to
+CLEANUP_BATCH_SIZE primary keys, then a DELETE by primary key in its own
+short transaction, then a pause of CLEANUP_BATCH_SLEEP seconds. Row locks
+are therefore held only for one batch at a time and never on rows the
+login path is using (a session being refreshed no longer matches).
+"""
+import logging
+import time
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import CleanupStat
+
+logger = logging.getLogger(__name__)
+
+# Each batch function selects the next batch and returns (queryset to
+# delete, whether more rows may follow). The DELETE re-checks the expiry
+# condition, so rows touched since the SELECT are kept.
+
+
+def expired_sessions_batch(batch_size):
+    from django.contrib.sessions.models import Session
+    queryset = Session.objects.using(DEFAULT_DB_ALIAS).filter(expire_date__lt=timezone.now())
+    # Served by the expire_date index.
+    pks = list(queryset.order_by("expire_date").values_list("pk", flat=True)[:batch_size])
+    return queryset.filter(pk__in=pks), len(pks) == batch_size
+
+
+def old_admin_log_batch(batch_size):
+    from django.contrib.admin.models import LogEntry
+    cutoff = timezone.now() - timedelta(days=settings.ADMIN_LOG_RETENTION_DAYS)
+    queryset = LogEntry.objects.using(DEFAULT_DB_ALIAS)
+    # action_time has no index, but ids grow with it: walk the primary key
+    # from the oldest row and stop at the first entry inside the retention
+    # window, instead of scanning the table for rows matching the cutoff.
+    rows = queryset.order_by("pk").values_list("pk", "action_time")[:batch_size]
+    pks = [pk for pk, _ in takewhile(lambda row: row[1] < cutoff, rows)]
+    return queryset.filter(pk__in=pks, action_time__lt=cutoff), len(pks) == batch_size
+
+
+JOBS = {
+    "sessions": expired_sessions_batch,
+    "admin_log": old_admin_log_batch,
+}
+
+
+def job_enabled(name):
+    if name == "sessions":
+        # Only database-backed sessions leave rows behind.
+        return settings.SESSION_ENGINE in (
+            "django.contrib.sessions.backends.db",
+            "django.contrib.sessions.backends.cached_db",
+        )
+    return True
+
+
+def purge_in_batches(next_batch, batch_size, sleep):
+    """Delete batches from `next_batch` until it is exhausted, yielding the row count of each."""
+    while True:
+        queryset, more = next_batch(batch_size)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            count, _ = queryset.delete()
+        if count:
+            yield count
+        if not more:
+            return
+        time.sleep(sleep)
+
+
+def _limit_lock_waits():
+    # Give up quickly instead of queueing behind a login-path transaction;
+    # the job is retried on its next run.
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION innodb_lock_wait_timeout = %s", [settings.CLEANUP_LOCK_WAIT_TIMEOUT])
+
+
+def run_job(name, batch_size=None, sleep=None):
+    """
+    Run one job and record its stats. Returns the CleanupStat row (unsaved if
+    the stats could not be written). Database errors are logged, not raised,
+    and a broken connection is dropped so the next run reconnects.
+    """
+    next_batch = JOBS[name]
+    batch_size = batch_size or settings.CLEANUP_BATCH_SIZE
+    sleep = settings.CLEANUP_BATCH_SLEEP if sleep is None else sleep
+
+    started = timezone.now()
+    deleted = batches = 0
+    error = ""
+    try:
+        _limit_lock_waits()
+        for count in purge_in_batches(next_batch, batch_size, sleep):
+            deleted += count
+            batches += 1
+    except DatabaseError as e:
+        error = str(e)
+        logger.warning("Cleanup job %s stopped after %d rows: %s", name, deleted, e)
+        close_old_connections()
+
+    fields = {
+        "last_started": started,
+        "last_finished": timezone.now(),
+        "last_deleted": deleted,
+        "last_batches": batches,
+        "last_error": error,
+    }
+    try:
+        stat, _ = CleanupStat.objects.using(DEFAULT_DB_ALIAS).get_or_create(job=name)
+        for field, value in fields.items():
+            setattr(stat, field, value)
+        stat.total_deleted += deleted
+        stat.save(using=DEFAULT_DB_ALIAS)
+    except DatabaseError:
+        logger.exception("Could not record stats for cleanup job %s", name)
+        close_old_connections()
+        stat = CleanupStat(job=name, total_deleted=deleted, **fields)
+    return stat
+
+
+def due_jobs(now=None):
+    """Names of enabled jobs whose last run started CLEANUP_INTERVAL seconds ago or more."""
+    now = now or timezone.now()
+    last_started = dict(
+        CleanupStat.objects.using(DEFAULT_DB_ALIAS).values_list("job", "last_started")
+    )
+    interval = timedelta(seconds=settings.CLEANUP_INTERVAL)
+    return [
+        name for name in JOBS
+        if job_enabled(name) and (last_started.get(name) is None or now - last_started[name] >= interval)
+    ]
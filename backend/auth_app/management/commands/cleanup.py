@@ -0,0 +1,80 @@
+# backend/auth_app/management/commands/cleanup.py
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from auth_app.cleanup import JOBS, due_jobs, job_enabled, run_job
+from auth_app.models import CleanupStat
+
+logger = logging.getLogger("auth_app.cleanup")
+
+
+class Command(BaseCommand):
+    help = "Purge expired sessions and old admin log entries in small batches, periodically."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run every enabled job once and exit.")
+        parser.add_argument(
+            "--job", action="append", choices=sorted(JOBS),
+            help="Only run this job (repeatable). Implies --once.",
+        )
+        parser.add_argument("--stats", action="store_true", help="Print last-run stats and exit.")
+        parser.add_argument("--batch-size", type=int, help="Rows per batch (default CLEANUP_BATCH_SIZE).")
+        parser.add_argument("--sleep", type=float, help="Seconds between batches (default CLEANUP_BATCH_SLEEP).")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            return self.print_stats()
+
+        if options["job"] or options["once"]:
+            names = options["job"] or [name for name in JOBS if job_enabled(name)]
+            for name in names:
+                self.run_one(name, options)
+            return
+
+        self.stdout.write(f"Cleanup scheduler started (interval {settings.CLEANUP_INTERVAL}s)")
+        try:
+            while True:
+                self.tick(options)
+                time.sleep(min(settings.CLEANUP_INTERVAL, 60))
+        except KeyboardInterrupt:
+            pass
+
+    def tick(self, options):
+        """One scheduler pass; survives database outages so the loop keeps running."""
+        # Drop connections the server closed (restart, failover, timeouts).
+        close_old_connections()
+        try:
+            names = due_jobs()
+        except DatabaseError:
+            logger.exception("Could not read cleanup schedule")
+            close_old_connections()
+            return
+        for name in names:
+            self.run_one(name, options)
+
+    def run_one(self, name, options):
+        stat = run_job(name, batch_size=options["batch_size"], sleep=options["sleep"])
+        duration = (stat.last_finished - stat.last_started).total_seconds()
+        line = f"{name}: deleted {stat.last_deleted} rows in {stat.last_batches} batches ({duration:.1f}s)"
+        if stat.last_error:
+            self.stderr.write(f"{line}, stopped: {stat.last_error}")
+        else:
+            self.stdout.write(line)
+
+    def print_stats(self):
+        stats = {stat.job: stat for stat in CleanupStat.objects.all()}
+        for name in JOBS:
+            stat = stats.get(name)
+            if stat is None or stat.last_started is None:
+                self.stdout.write(f"{name}: never run")
+                continue
+            self.stdout.write(
+                f"{name}: last run {stat.last_started:%Y-%m-%d %H:%M:%S} UTC, "
+                f"deleted {stat.last_deleted} in {stat.last_batches} batches, "
+                f"{stat.total_deleted} total"
+                + (f", error: {stat.last_error}" if stat.last_error else "")
+            )
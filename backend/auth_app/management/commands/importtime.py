@@ -0,0 +1,82 @@
+# backend/auth_app/management/commands/importtime.py
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a gunicorn worker loads before serving: the WSGI app plus the URLconf
+# (and with it every view module), which Django otherwise imports on the
+# first request.
+BOOT_SCRIPT = """
+from auth.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+DOTTED_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+
+def run_cold(script=BOOT_SCRIPT, importtime=False):
+    """Run `script` in a fresh interpreter. Returns the CompletedProcess, or
+    raises CommandError with the child's stderr if it fails."""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", script]
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+    try:
+        return subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise CommandError(e.stderr)
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|")
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue  # header line
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Report per-module import time for a cold worker boot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=25, help="Number of modules to show.")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative",
+            help="Order by time including submodules (default) or by the module alone.",
+        )
+        parser.add_argument("--prefix", help="Only show modules starting with this prefix, e.g. auth_app.")
+        parser.add_argument(
+            "--module",
+            help="Import this module (after django.setup(), so app modules load) instead of "
+                 "the WSGI app and URLconf.",
+        )
+
+    def handle(self, *args, **options):
+        module = options["module"]
+        if module and not DOTTED_NAME.fullmatch(module):
+            raise CommandError(f"Not a dotted module name: {module!r}")
+        script = f"import django\ndjango.setup()\nimport {module}" if module else BOOT_SCRIPT
+        rows = parse_importtime(run_cold(script, importtime=True).stderr)
+        if options["prefix"]:
+            rows = [row for row in rows if row[0].startswith(options["prefix"])]
+
+        key = 2 if options["sort"] == "cumulative" else 1
+        rows.sort(key=lambda row: row[key], reverse=True)
+        total_ms = sum(row[1] for row in rows) / 1000
+
+        self.stdout.write(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for module, self_us, cumulative_us in rows[:options["limit"]]:
+            self.stdout.write(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}")
+        self.stdout.write(f"{len(rows)} modules, {total_ms:.1f} ms total self time")
@@ -0,0 +1,58 @@
+# backend/auth_app/management/commands/profiles.py
+import io
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app.profiling import ProfileStore
+
+
+class Command(BaseCommand):
+    help = "List stored request profiles, slowest first, or dump one of them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile_id", nargs="?", help="Dump this profile instead of listing.")
+        parser.add_argument("--limit", type=int, default=30, help="Functions (or profiles) to show.")
+        parser.add_argument(
+            "--sort", default="cumulative", choices=["cumulative", "tottime", "calls"],
+            help="pstats sort key for the dump.",
+        )
+
+    def handle(self, *args, **options):
+        store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_KEEP)
+        if options["profile_id"]:
+            self.dump(store, options)
+        else:
+            self.list_profiles(store, options["limit"])
+
+    def list_profiles(self, store, limit):
+        profiles = store.list()
+        if not profiles:
+            self.stdout.write(f"No profiles in {store.directory}")
+            return
+        self.stdout.write(f"{'ms':>9} {'sql':>4} {'sql ms':>8}  {'status':<6} request  id")
+        for meta in profiles[:limit]:
+            self.stdout.write(
+                f"{meta['duration_ms']:9.1f} {meta['query_count']:4d} {meta['query_ms']:8.1f}  "
+                f"{meta['status']:<6} {meta['method']} {meta['path']}  {meta['id']}"
+            )
+
+    def dump(self, store, options):
+        try:
+            meta, prof_path = store.load(options["profile_id"])
+        except FileNotFoundError:
+            raise CommandError(f"No profile {options['profile_id']!r} in {store.directory}")
+
+        self.stdout.write(
+            f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']:.1f} ms "
+            f"({meta['created']})"
+        )
+        self.stdout.write(f"\n{meta['query_count']} queries, {meta['query_ms']:.1f} ms:")
+        for query in sorted(meta["queries"], key=lambda q: q["ms"], reverse=True):
+            self.stdout.write(f"{query['ms']:9.2f} ms  [{query['db']}] {query['sql']}")
+
+        output = io.StringIO()
+        stats = pstats.Stats(str(prof_path), stream=output)
+        stats.sort_stats(options["sort"]).print_stats(options["limit"])
+        self.stdout.write(output.getvalue())
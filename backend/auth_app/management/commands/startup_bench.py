@@ -0,0 +1,37 @@
+# backend/auth_app/management/commands/startup_bench.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from .importtime import run_cold
+
+
+class Command(BaseCommand):
+    help = "Time cold worker boots (WSGI app + URLconf) in fresh interpreters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=10, help="Number of cold boots to time.")
+
+    def handle(self, *args, **options):
+        baseline, boot = [], []
+        for _ in range(options["runs"]):
+            # A bare interpreter start is measured alongside each boot so the
+            # report isolates what the project itself costs.
+            start = time.perf_counter()
+            run_cold("pass")
+            baseline.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            run_cold()
+            boot.append(time.perf_counter() - start)
+
+        for label, samples in (("interpreter", baseline), ("worker boot", boot)):
+            self.stdout.write(
+                f"{label:<12} min {min(samples) * 1000:7.1f} ms  "
+                f"median {statistics.median(samples) * 1000:7.1f} ms"
+            )
+        self.stdout.write(
+            f"project cost min {(min(boot) - min(baseline)) * 1000:7.1f} ms  "
+            f"median {(statistics.median(boot) - statistics.median(baseline)) * 1000:7.1f} ms"
+        )
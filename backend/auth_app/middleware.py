@@ -0,0 +1,137 @@
+# backend/auth_app/middleware.py
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import routers
+
+logger = logging.getLogger(__name__)
+
+REPLICA_PIN_COOKIE = "primary_db_pin"
+
+
+class ReplicaPinMiddleware:
+    """
+    Keep a client's reads on the primary for REPLICA_PIN_SECONDS after it
+    writes, so e.g. the request after MFAVerifyView sees mfa_enabled=True
+    even while the replicas are catching up.
+
+    The pin is stored server-side per user (checked by CustomJWTAuthentication
+    and TokenRefreshView), since the SPA calls the API cross-origin without
+    credentials and never sends cookies back; the cookie is an extra signal
+    for clients that do.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = routers.start_request(pinned=REPLICA_PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if routers.wrote_to_primary():
+                # DRF copies the authenticated user onto the Django request.
+                user = getattr(request, "user", None)
+                if user is not None and user.is_authenticated:
+                    routers.pin_user(user.pk)
+                response.set_cookie(
+                    REPLICA_PIN_COOKIE,
+                    "1",
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            routers.end_request(tokens)
+        return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile a sample of requests with cProfile and record their SQL.
+
+    Enabled with REQUEST_PROFILING. A request is profiled when its path
+    starts with one of PROFILE_PATHS, when it carries PROFILE_HEADER set to
+    PROFILE_TOKEN, or at random with probability PROFILE_SAMPLE_RATE. The
+    slowest PROFILE_KEEP profiles are kept (see auth_app.profiling); list
+    and dump them with `manage.py profiles`. Unsampled requests only pay
+    for the sampling decision.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        from .profiling import ProfileStore
+
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.paths = tuple(settings.PROFILE_PATHS)
+        self.header = settings.PROFILE_HEADER
+        self.token = settings.PROFILE_TOKEN
+        self.store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_KEEP)
+
+    def should_profile(self, request):
+        if self.paths and request.path.startswith(self.paths):
+            return True
+        # Without a token the header is ignored, so clients can't trigger profiling.
+        if self.token and request.headers.get(self.header) == self.token:
+            return True
+        return random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this process (Python 3.12+),
+            # e.g. a concurrent sampled request: serve this one unprofiled.
+            return self.get_response(request)
+
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    "db": context["connection"].alias,
+                    "sql": sql,
+                    "ms": round((time.perf_counter() - start) * 1000, 3),
+                })
+
+        with ExitStack() as stack:
+            stack.callback(profiler.disable)  # also if a wrapper fails to install
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            start = time.perf_counter()
+            response = self.get_response(request)
+            duration_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            if self.store.qualifies(duration_ms):
+                profile_id = self.store.save(profiler, {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration_ms, 3),
+                    "query_count": len(queries),
+                    "query_ms": round(sum(q["ms"] for q in queries), 3),
+                    "queries": queries,
+                })
+                response["X-Profile-Id"] = profile_id
+        except OSError:
+            # Unwritable PROFILE_DIR, full disk, rotation race: profiling must
+            # never fail the request it observes.
+            logger.exception("Could not store request profile for %s", request.path)
+        return response
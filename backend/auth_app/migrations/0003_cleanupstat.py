@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_webauthncredential'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CleanupStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=32, unique=True)),
+                ('last_started', models.DateTimeField(blank=True, null=True)),
+                ('last_finished', models.DateTimeField(blank=True, null=True)),
+                ('last_deleted', models.PositiveIntegerField(default=0)),
+                ('last_batches', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('total_deleted', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+import base64
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_credential_hash(apps, schema_editor):
+    WebAuthnCredential = apps.get_model("auth_app", "WebAuthnCredential")
+    for credential in WebAuthnCredential.objects.all():
+        raw_id = base64.urlsafe_b64decode(credential.credential_id + "=" * (-len(credential.credential_id) % 4))
+        credential.credential_hash = hashlib.sha256(raw_id).hexdigest()
+        credential.save(update_fields=["credential_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0003_cleanupstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webauthncredential',
+            name='credential_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_credential_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='webauthncredential',
+            name='credential_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='webauthncredential',
+            name='credential_id',
+            field=models.TextField(),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
@@ -30,3 +32,38 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.email
+
+
+class WebAuthnCredential(models.Model):
+    """A passkey/security key registered as a second factor."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="webauthn_credentials")
+    # IDs can be up to 1023 bytes, too long for a unique index on MySQL, so
+    # lookups go through a fixed-length hash of the raw ID.
+    credential_id = models.TextField()  # base64url
+    credential_hash = models.CharField(max_length=64, unique=True)  # sha256 of the raw ID
+    public_key = models.BinaryField()  # COSE-encoded
+    sign_count = models.PositiveBigIntegerField(default=0)
+    name = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.user.email} ({self.name or self.credential_id[:12]})"
+
+    @staticmethod
+    def hash_id(raw_id):
+        return hashlib.sha256(raw_id).hexdigest()
+
+
+class CleanupStat(models.Model):
+    """Outcome of the latest run of each cleanup job (see auth_app.cleanup)."""
+    job = models.CharField(max_length=32, unique=True)
+    last_started = models.DateTimeField(blank=True, null=True)
+    last_finished = models.DateTimeField(blank=True, null=True)
+    last_deleted = models.PositiveIntegerField(default=0)
+    last_batches = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    total_deleted = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return self.job
@@ -0,0 +1,144 @@
+# backend/auth_app/passkeys.py
+"""
+WebAuthn/passkey second factor.
+
+Challenges live in the cache for WEBAUTHN_CHALLENGE_TTL seconds and are
+single-use, so verifying an assertion is one cache read plus a local
+signature check.
+
+The webauthn package (and cryptography behind it) is imported inside the
+functions below so it only loads once a passkey endpoint is hit.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import WebAuthnCredential
+
+
+class PasskeyError(Exception):
+    """Raised when a registration or assertion cannot be verified."""
+
+
+def _challenge_key(purpose, user):
+    return f"webauthn:{purpose}:{user.pk}"
+
+
+def _store_challenge(purpose, user, challenge):
+    from webauthn.helpers import bytes_to_base64url
+    cache.set(_challenge_key(purpose, user), bytes_to_base64url(challenge), settings.WEBAUTHN_CHALLENGE_TTL)
+
+
+def _pop_challenge(purpose, user):
+    from webauthn.helpers import base64url_to_bytes
+    key = _challenge_key(purpose, user)
+    challenge = cache.get(key)
+    # delete() reports whether the key was still there, so a challenge can
+    # only be consumed once even by concurrent requests.
+    if challenge is None or not cache.delete(key):
+        raise PasskeyError("Challenge expired or not requested")
+    return base64url_to_bytes(challenge)
+
+
+def _descriptors(user):
+    from webauthn.helpers import base64url_to_bytes
+    from webauthn.helpers.structs import PublicKeyCredentialDescriptor
+    return [
+        PublicKeyCredentialDescriptor(id=base64url_to_bytes(credential_id))
+        for credential_id in user.webauthn_credentials.values_list("credential_id", flat=True)
+    ]
+
+
+def registration_options(user):
+    """Return creation options (JSON string) and remember the challenge."""
+    from webauthn import generate_registration_options, options_to_json
+    options = generate_registration_options(
+        rp_id=settings.WEBAUTHN_RP_ID,
+        rp_name=settings.WEBAUTHN_RP_NAME,
+        user_id=str(user.pk).encode(),
+        user_name=user.email,
+        exclude_credentials=_descriptors(user),
+    )
+    _store_challenge("register", user, options.challenge)
+    return options_to_json(options)
+
+
+def verify_registration(user, credential, name=""):
+    """Verify an attestation response and store the new credential."""
+    from webauthn import verify_registration_response
+    from webauthn.helpers import bytes_to_base64url
+    from webauthn.helpers.exceptions import WebAuthnException
+
+    challenge = _pop_challenge("register", user)
+    try:
+        verified = verify_registration_response(
+            credential=credential,
+            expected_challenge=challenge,
+            expected_rp_id=settings.WEBAUTHN_RP_ID,
+            expected_origin=settings.WEBAUTHN_ORIGINS,
+        )
+    except WebAuthnException as e:
+        raise PasskeyError(str(e))
+
+    credential_hash = WebAuthnCredential.hash_id(verified.credential_id)
+    if WebAuthnCredential.objects.filter(credential_hash=credential_hash).exists():
+        raise PasskeyError("Credential already registered")
+    try:
+        with transaction.atomic():
+            return WebAuthnCredential.objects.create(
+                user=user,
+                credential_id=bytes_to_base64url(verified.credential_id),
+                credential_hash=credential_hash,
+                public_key=verified.credential_public_key,
+                sign_count=verified.sign_count,
+                name=name,
+            )
+    except IntegrityError:
+        # Lost a race with a concurrent registration of the same credential.
+        raise PasskeyError("Credential already registered")
+
+
+def authentication_options(user):
+    """Return request options (JSON string) for the user's credentials."""
+    from webauthn import generate_authentication_options, options_to_json
+    allow_credentials = _descriptors(user)
+    if not allow_credentials:
+        raise PasskeyError("No passkeys registered")
+    options = generate_authentication_options(
+        rp_id=settings.WEBAUTHN_RP_ID,
+        allow_credentials=allow_credentials,
+    )
+    _store_challenge("authenticate", user, options.challenge)
+    return options_to_json(options)
+
+
+def verify_authentication(user, credential):
+    """Verify an assertion against the stored public key and bump its sign count."""
+    from webauthn import verify_authentication_response
+    from webauthn.helpers import base64url_to_bytes
+    from webauthn.helpers.exceptions import WebAuthnException
+
+    challenge = _pop_challenge("authenticate", user)
+    try:
+        raw_id = base64url_to_bytes(credential["id"])
+        stored = WebAuthnCredential.objects.get(user=user, credential_hash=WebAuthnCredential.hash_id(raw_id))
+    except (KeyError, TypeError, ValueError, WebAuthnCredential.DoesNotExist):
+        raise PasskeyError("Unknown credential")
+
+    try:
+        verified = verify_authentication_response(
+            credential=credential,
+            expected_challenge=challenge,
+            expected_rp_id=settings.WEBAUTHN_RP_ID,
+            expected_origin=settings.WEBAUTHN_ORIGINS,
+            credential_public_key=bytes(stored.public_key),
+            credential_current_sign_count=stored.sign_count,
+        )
+    except WebAuthnException as e:
+        raise PasskeyError(str(e))
+
+    stored.sign_count = verified.new_sign_count
+    stored.last_used_at = timezone.now()
+    stored.save(update_fields=["sign_count", "last_used_at"])
+    return stored
@@ -0,0 +1,64 @@
+# backend/auth_app/profiling.py
+"""
+On-disk store for sampled request profiles (see RequestProfilingMiddleware).
+
+Each profile is two files in PROFILE_DIR: `<id>.prof` (cProfile stats,
+readable with pstats/snakeviz) and `<id>.json` (request, timing and SQL).
+Only the PROFILE_KEEP slowest profiles are kept.
+"""
+import json
+import os
+import uuid
+from pathlib import Path
+
+from django.utils import timezone
+
+
+class ProfileStore:
+    def __init__(self, directory, keep):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def _path(self, profile_id, suffix):
+        return self.directory / f"{profile_id}{suffix}"
+
+    def list(self):
+        """Metadata of stored profiles, slowest first."""
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # being written or rotated by another worker
+        return sorted(profiles, key=lambda p: p["duration_ms"], reverse=True)
+
+    def load(self, profile_id):
+        """Return (metadata, path to .prof). Raises FileNotFoundError."""
+        meta = json.loads(self._path(profile_id, ".json").read_text())
+        return meta, self._path(profile_id, ".prof")
+
+    def qualifies(self, duration_ms):
+        """Whether a request this slow would make it into the store."""
+        if self.keep <= 0:
+            return False
+        profiles = self.list()
+        return len(profiles) < self.keep or duration_ms > profiles[-1]["duration_ms"]
+
+    def save(self, profiler, meta):
+        """Write a profile, then drop the fastest ones beyond `keep`. Returns its id."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        meta = {"id": profile_id, "created": timezone.now().isoformat(), **meta}
+        profiler.dump_stats(self._path(profile_id, ".prof"))
+        # Write metadata last and atomically: list() only sees complete profiles.
+        tmp = self._path(profile_id, ".json.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self._path(profile_id, ".json"))
+
+        for stale in self.list()[self.keep:]:
+            for suffix in (".json", ".prof"):
+                try:
+                    self._path(stale["id"], suffix).unlink()
+                except FileNotFoundError:
+                    pass
+        return profile_id
@@ -0,0 +1,110 @@
+# backend/auth_app/routers.py
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set once the current request (or command) has written to the primary, so
+# follow-up reads see their own writes instead of a lagging replica.
+_pinned = ContextVar("db_pinned_to_primary", default=False)
+_wrote = ContextVar("db_wrote_to_primary", default=False)
+
+
+def pin_to_primary():
+    """Send every read in the current context to the primary."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+def mark_primary_write(sender=None, using=None, instance=None, raw=False, **kwargs):
+    """post_save/post_delete receiver: pin reads after a write to the primary."""
+    if using in (None, DEFAULT_DB_ALIAS):
+        _wrote.set(True)
+        _pinned.set(True)
+        # Writes to a user (register, password reset) often happen while the
+        # request is anonymous; pin by id and email so the next login sees them.
+        if sender is not None and sender._meta.label == settings.AUTH_USER_MODEL and not raw:
+            pin_user(instance.pk)
+            pin_email(instance.email)
+
+
+def _user_pin_key(user_id):
+    return f"db_pin:{user_id}"
+
+
+def _email_pin_key(email):
+    return f"db_pin:email:{email.lower()}"
+
+
+def pin_user(user_id):
+    """Keep the user's reads on the primary for REPLICA_PIN_SECONDS, across requests."""
+    cache.set(_user_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def pin_email(email):
+    """Same as pin_user(), for lookups by email (login, password reset request)."""
+    cache.set(_email_pin_key(email), True, settings.REPLICA_PIN_SECONDS)
+
+
+def pin_if_user_pinned(user_id):
+    """Pin the current context when the user wrote recently. Call before loading the user."""
+    if cache.get(_user_pin_key(user_id)):
+        pin_to_primary()
+
+
+def pin_if_email_pinned(email):
+    """Like pin_if_user_pinned(), keyed by email."""
+    if email and cache.get(_email_pin_key(email)):
+        pin_to_primary()
+
+
+def start_request(pinned=False):
+    """Reset pin state at the start of a request. Returns tokens for end_request()."""
+    return _pinned.set(pinned), _wrote.set(False)
+
+
+def end_request(tokens):
+    pinned_token, wrote_token = tokens
+    _pinned.reset(pinned_token)
+    _wrote.reset(wrote_token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to settings.REPLICA_DATABASES and writes to the primary.
+    Reads stay on the primary once the current context has written to it
+    or while a transaction is open there.
+    """
+
+    def _replicas(self):
+        return getattr(settings, "REPLICA_DATABASES", [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same data.
+        databases = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
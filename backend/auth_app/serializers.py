@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
+from . import routers
 from .models import User
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -34,6 +35,7 @@ class LoginSerializer(serializers.Serializer):
         email = attrs.get("email", "").lower()
         password = attrs.get("password")
         if email and password:
+            routers.pin_if_email_pinned(email)
             user = authenticate(username=email, password=password)
             if not user:
                 raise serializers.ValidationError(_("Unable to log in with provided credentials."))
@@ -53,6 +55,25 @@ class MFAVerifySerializer(serializers.Serializer):
         return value
 
 
+class WebAuthnVerifySerializer(serializers.Serializer):
+    credential = serializers.JSONField()
+
+    def validate_credential(self, value):
+        if not isinstance(value, dict) or not value.get("id"):
+            raise serializers.ValidationError("Invalid WebAuthn credential.")
+        return value
+
+
+class WebAuthnRegisterSerializer(WebAuthnVerifySerializer):
+    name = serializers.CharField(max_length=64, required=False, allow_blank=True, default="")
+    # Proof of an existing factor, required once MFA is enabled.
+    totp = serializers.CharField(required=False)
+    assertion = serializers.JSONField(required=False)
+
+    def validate_assertion(self, value):
+        return self.validate_credential(value)
+
+
 class RequestPasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
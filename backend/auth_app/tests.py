@@ -0,0 +1,507 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pyotp
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from webauthn.helpers import base64url_to_bytes, bytes_to_base64url, encode_cbor
+
+from . import cleanup, routers
+from .management.commands.importtime import BOOT_SCRIPT, parse_importtime, run_cold
+from .middleware import REPLICA_PIN_COOKIE
+from .models import CleanupStat, User, WebAuthnCredential
+from .profiling import ProfileStore
+from .views import create_jwt
+
+
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """The test settings use two separate SQLite databases, so a row written
+    to the primary is only visible when the read is routed there too."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.tokens = routers.start_request()
+
+    def tearDown(self):
+        routers.end_request(self.tokens)
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(User.objects.all().db, "replica")
+        user = User.objects.create_user(email="alice@gmail.com", password="s3cret-pass")
+        self.assertEqual(user._state.db, "default")
+
+    def test_save_pins_reads_to_primary(self):
+        User.objects.create_user(email="alice@gmail.com", password="s3cret-pass")
+        self.assertTrue(routers.is_pinned())
+        self.assertTrue(User.objects.filter(email="alice@gmail.com").exists())
+
+    def test_unpinned_read_misses_row_only_on_primary(self):
+        User.objects.create_user(email="alice@gmail.com", password="s3cret-pass")
+        routers.end_request(self.tokens)
+        self.tokens = routers.start_request()
+        self.assertFalse(User.objects.filter(email="alice@gmail.com").exists())
+
+    def test_instance_read_from_replica_saves_to_primary(self):
+        primary = User.objects.create(email="bob@gmail.com")
+        User.objects.using("replica").create(pk=primary.pk, email="bob@gmail.com")
+        routers.end_request(self.tokens)
+        self.tokens = routers.start_request()
+
+        user = User.objects.get(email="bob@gmail.com")
+        self.assertEqual(user._state.db, "replica")
+        user.mfa_enabled = True
+        user.save()
+        self.assertTrue(User.objects.using("default").get(email="bob@gmail.com").mfa_enabled)
+        self.assertFalse(User.objects.using("replica").get(email="bob@gmail.com").mfa_enabled)
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    def test_warns_when_replicas_use_process_local_cache(self):
+        from .checks import check_replica_pin_cache
+
+        self.assertEqual([w.id for w in check_replica_pin_cache(None)], ["auth_app.W001"])
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_replica_pin_cache(None), [])
+        with self.settings(REPLICA_DATABASES=[]):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+
+class ReplicaPinMiddlewareTests(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.tokens = routers.start_request()
+        # The user exists on both databases, without an MFA secret yet.
+        self.user = User.objects.create(email="carol@gmail.com")
+        User.objects.using("replica").create(pk=self.user.pk, email="carol@gmail.com")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {create_jwt(self.user)}")
+
+    def tearDown(self):
+        routers.end_request(self.tokens)
+
+    def test_read_only_request_is_served_from_replica(self):
+        response = self.client.post("/auth/token/refresh/", {"refresh": create_jwt(self.user, "refresh")})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_write_sets_pin_cookie_and_next_request_reads_primary(self):
+        # MFASetupView reads the user from the replica (no secret yet) and
+        # saves a freshly generated one to the primary.
+        response = self.client.get("/auth/mfa/setup/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        secret = response.data["mfa_secret"]
+
+        response = self.client.get("/auth/mfa/setup/")
+        self.assertEqual(response.data["mfa_secret"], secret)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_register_then_login_without_cookies(self):
+        response = APIClient().post("/auth/register/", {"email": "frank@gmail.com", "password": "s3cret-pass"})
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(User.objects.using("replica").filter(email="frank@gmail.com").exists())
+
+        response = APIClient().post("/auth/login/", {"email": "frank@gmail.com", "password": "s3cret-pass"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_write_pins_user_without_cookies(self):
+        # Like the SPA: cross-origin without credentials, so no cookie comes back.
+        secret = self.client.get("/auth/mfa/setup/").data["mfa_secret"]
+        self.client.cookies.clear()
+
+        response = self.client.get("/auth/mfa/setup/")
+        self.assertEqual(response.data["mfa_secret"], secret)
+        response = APIClient().post("/auth/token/refresh/", {"refresh": create_jwt(self.user, "refresh")})
+        self.assertEqual(response.status_code, 200)
+
+
+class SoftwareAuthenticator:
+    """Minimal P-256 authenticator producing "none" attestations and assertions."""
+
+    def __init__(self, rp_id, origin):
+        self.rp_id_hash = hashlib.sha256(rp_id.encode()).digest()
+        self.origin = origin
+        self.private_key = ec.generate_private_key(ec.SECP256R1())
+        self.credential_id = os.urandom(32)
+        self.sign_count = 0
+
+    def _client_data(self, kind, options):
+        return json.dumps({
+            "type": kind,
+            "challenge": options["challenge"],
+            "origin": self.origin,
+            "crossOrigin": False,
+        }).encode()
+
+    def _auth_data(self, flags, attested=b""):
+        self.sign_count += 1
+        return self.rp_id_hash + bytes([flags]) + self.sign_count.to_bytes(4, "big") + attested
+
+    def create(self, options):
+        numbers = self.private_key.public_key().public_numbers()
+        cose_key = encode_cbor({
+            1: 2, 3: -7, -1: 1,
+            -2: numbers.x.to_bytes(32, "big"),
+            -3: numbers.y.to_bytes(32, "big"),
+        })
+        attested = bytes(16) + len(self.credential_id).to_bytes(2, "big") + self.credential_id + cose_key
+        attestation_object = encode_cbor({
+            "fmt": "none",
+            "attStmt": {},
+            "authData": self._auth_data(0x45, attested),  # UP | UV | AT
+        })
+        raw_id = bytes_to_base64url(self.credential_id)
+        return {
+            "id": raw_id,
+            "rawId": raw_id,
+            "type": "public-key",
+            "response": {
+                "clientDataJSON": bytes_to_base64url(self._client_data("webauthn.create", options)),
+                "attestationObject": bytes_to_base64url(attestation_object),
+            },
+        }
+
+    def get(self, options):
+        client_data = self._client_data("webauthn.get", options)
+        auth_data = self._auth_data(0x05)  # UP | UV
+        signature = self.private_key.sign(
+            auth_data + hashlib.sha256(client_data).digest(), ec.ECDSA(hashes.SHA256())
+        )
+        raw_id = bytes_to_base64url(self.credential_id)
+        return {
+            "id": raw_id,
+            "rawId": raw_id,
+            "type": "public-key",
+            "response": {
+                "clientDataJSON": bytes_to_base64url(client_data),
+                "authenticatorData": bytes_to_base64url(auth_data),
+                "signature": bytes_to_base64url(signature),
+            },
+        }
+
+
+class WebAuthnMFATests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="dave@gmail.com", password="s3cret-pass")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {create_jwt(self.user)}")
+        self.authenticator = SoftwareAuthenticator(settings.WEBAUTHN_RP_ID, settings.WEBAUTHN_ORIGINS[0])
+
+    def register(self):
+        options = self.client.post("/auth/mfa/webauthn/register/options/").data
+        return self.client.post(
+            "/auth/mfa/webauthn/register/verify/",
+            {"credential": self.authenticator.create(options), "name": "laptop"},
+            format="json",
+        )
+
+    def authenticate(self):
+        options = self.client.post("/auth/mfa/webauthn/authenticate/options/").data
+        return self.client.post(
+            "/auth/mfa/webauthn/authenticate/verify/",
+            {"credential": self.authenticator.get(options)},
+            format="json",
+        )
+
+    def test_register_stores_credential_and_enables_mfa(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 201)
+        credential = WebAuthnCredential.objects.get(user=self.user)
+        self.assertEqual(base64url_to_bytes(credential.credential_id), self.authenticator.credential_id)
+        self.assertEqual(credential.name, "laptop")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.mfa_enabled)
+
+    def test_register_accepts_long_credential_id(self):
+        self.authenticator.credential_id = os.urandom(1023)  # WebAuthn maximum
+        self.assertEqual(self.register().status_code, 201)
+        self.assertEqual(self.authenticate().status_code, 200)
+
+    def test_authenticate_verifies_signature_and_updates_sign_count(self):
+        self.register()
+        response = self.authenticate()
+        self.assertEqual(response.status_code, 200)
+        credential = WebAuthnCredential.objects.get(user=self.user)
+        self.assertEqual(credential.sign_count, self.authenticator.sign_count)
+        self.assertIsNotNone(credential.last_used_at)
+
+    def test_challenge_is_single_use(self):
+        self.register()
+        options = self.client.post("/auth/mfa/webauthn/authenticate/options/").data
+        assertion = self.authenticator.get(options)
+        first = self.client.post("/auth/mfa/webauthn/authenticate/verify/", {"credential": assertion}, format="json")
+        replay = self.client.post("/auth/mfa/webauthn/authenticate/verify/", {"credential": assertion}, format="json")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 400)
+
+    def test_rejects_assertion_from_other_key(self):
+        self.register()
+        options = self.client.post("/auth/mfa/webauthn/authenticate/options/").data
+        impostor = SoftwareAuthenticator(settings.WEBAUTHN_RP_ID, settings.WEBAUTHN_ORIGINS[0])
+        impostor.credential_id = self.authenticator.credential_id
+        response = self.client.post(
+            "/auth/mfa/webauthn/authenticate/verify/", {"credential": impostor.get(options)}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_requires_existing_factor_once_mfa_enabled(self):
+        self.user.mfa_enabled = True
+        self.user.mfa_secret = "JBSWY3DPEHPK3PXP"
+        self.user.save()
+        self.assertEqual(self.register().status_code, 403)
+        self.assertFalse(WebAuthnCredential.objects.exists())
+
+        options = self.client.post("/auth/mfa/webauthn/register/options/").data
+        response = self.client.post(
+            "/auth/mfa/webauthn/register/verify/",
+            {"credential": self.authenticator.create(options), "totp": pyotp.TOTP(self.user.mfa_secret).now()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_register_second_passkey_with_assertion_from_first(self):
+        self.register()
+        second = SoftwareAuthenticator(settings.WEBAUTHN_RP_ID, settings.WEBAUTHN_ORIGINS[0])
+        assertion = self.authenticator.get(self.client.post("/auth/mfa/webauthn/authenticate/options/").data)
+        options = self.client.post("/auth/mfa/webauthn/register/options/").data
+        response = self.client.post(
+            "/auth/mfa/webauthn/register/verify/",
+            {"credential": second.create(options), "assertion": assertion},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WebAuthnCredential.objects.filter(user=self.user).count(), 2)
+
+    def test_password_only_token_cannot_read_totp_secret_to_add_passkey(self):
+        self.register()  # MFA is now enabled
+        self.user.refresh_from_db()
+        self.user.mfa_secret = "JBSWY3DPEHPK3PXP"
+        self.user.save()
+
+        response = self.client.get("/auth/mfa/setup/")
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn("mfa_secret", response.data)
+
+        # Without the secret, a guessed code doesn't pass as proof either.
+        options = self.client.post("/auth/mfa/webauthn/register/options/").data
+        intruder = SoftwareAuthenticator(settings.WEBAUTHN_RP_ID, settings.WEBAUTHN_ORIGINS[0])
+        response = self.client.post(
+            "/auth/mfa/webauthn/register/verify/",
+            {"credential": intruder.create(options), "totp": "000000"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.mfa_secret, "JBSWY3DPEHPK3PXP")
+
+    def test_authenticate_options_require_registered_passkey(self):
+        response = self.client.post("/auth/mfa/webauthn/authenticate/options/")
+        self.assertEqual(response.status_code, 400)
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_worker_boot_defers_heavy_modules(self):
+        script = BOOT_SCRIPT + "import sys; print(' '.join(sorted(sys.modules)))"
+        loaded = set(run_cold(script).stdout.split())
+        # dotenv is left out: it loads whenever a developer has a .env file.
+        for module in ("qrcode", "PIL", "pyotp", "jwt", "webauthn"):
+            self.assertNotIn(module, loaded)
+        self.assertIn("auth_app.views", loaded)
+
+    def test_failing_boot_reports_child_stderr(self):
+        with self.assertRaisesMessage(CommandError, "ModuleNotFoundError"):
+            call_command("importtime", "--module", "no_such_module_xyz", stdout=StringIO())
+
+    def test_module_option_profiles_app_modules(self):
+        out = StringIO()
+        call_command("importtime", "--module", "auth_app.views", "--prefix", "auth_app", stdout=out)
+        self.assertIn("auth_app.views", out.getvalue())
+
+    def test_rejects_non_module_name(self):
+        with self.assertRaisesMessage(CommandError, "Not a dotted module name"):
+            call_command("importtime", "--module", "os; print(1)", stdout=StringIO())
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        450 | auth_app.views\n"
+            "import time:        30 |         30 |   auth_app.utils\n"
+        )
+        self.assertEqual(
+            parse_importtime(stderr),
+            [("auth_app.views", 120, 450), ("auth_app.utils", 30, 30)],
+        )
+
+
+@override_settings(CLEANUP_BATCH_SLEEP=0)
+class CleanupTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key="active", session_data="", expire_date=now + timedelta(days=1))
+
+    def test_purges_expired_sessions_in_batches(self):
+        stat = cleanup.run_job("sessions", batch_size=2)
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["active"])
+        self.assertEqual((stat.last_deleted, stat.last_batches, stat.last_error), (5, 3, ""))
+
+    @override_settings(ADMIN_LOG_RETENTION_DAYS=30)
+    def test_purges_admin_log_by_pk_up_to_first_recent_entry(self):
+        from django.contrib.admin.models import LogEntry
+
+        user = User.objects.create_user(email="gina@gmail.com", password="s3cret-pass")
+        now = timezone.now()
+        for days in (90, 60, 45, 10, 1):
+            LogEntry.objects.create(user=user, action_time=now - timedelta(days=days), action_flag=1)
+
+        stat = cleanup.run_job("admin_log", batch_size=2)
+        self.assertEqual((stat.last_deleted, stat.last_batches), (3, 2))
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+    def test_stats_accumulate_across_runs(self):
+        cleanup.run_job("sessions")
+        Session.objects.create(session_key="expired9", session_data="", expire_date=timezone.now() - timedelta(days=1))
+        cleanup.run_job("sessions")
+        stat = CleanupStat.objects.get(job="sessions")
+        self.assertEqual((stat.last_deleted, stat.total_deleted), (1, 6))
+
+    @override_settings(CLEANUP_INTERVAL=3600)
+    def test_due_jobs_waits_for_interval(self):
+        self.assertIn("sessions", cleanup.due_jobs())
+        cleanup.run_job("sessions")
+        self.assertNotIn("sessions", cleanup.due_jobs())
+        self.assertIn("sessions", cleanup.due_jobs(now=timezone.now() + timedelta(hours=1)))
+
+    def test_database_error_is_recorded_not_raised(self):
+        with mock.patch.object(cleanup, "purge_in_batches", side_effect=OperationalError("gone away")), \
+                mock.patch.object(cleanup, "close_old_connections") as close, \
+                self.assertLogs("auth_app.cleanup", "WARNING") as logs:
+            stat = cleanup.run_job("sessions")
+        self.assertIn("Cleanup job sessions stopped after 0 rows: gone away", logs.output[0])
+        self.assertEqual(stat.last_error, "gone away")
+        self.assertEqual(CleanupStat.objects.get(job="sessions").last_error, "gone away")
+        close.assert_called_once()
+
+    def test_stats_write_failure_is_logged_not_raised(self):
+        with mock.patch.object(CleanupStat.objects, "using", side_effect=OperationalError("gone away")), \
+                mock.patch.object(cleanup, "close_old_connections"), \
+                self.assertLogs("auth_app.cleanup", "ERROR"):
+            stat = cleanup.run_job("sessions")
+        self.assertEqual((stat.pk, stat.last_deleted), (None, 5))
+
+    def test_scheduler_tick_survives_schedule_read_failure(self):
+        from .management.commands.cleanup import Command
+
+        with mock.patch("auth_app.management.commands.cleanup.due_jobs", side_effect=OperationalError("gone away")), \
+                mock.patch("auth_app.management.commands.cleanup.close_old_connections") as close, \
+                self.assertLogs("auth_app.cleanup", "ERROR"):
+            Command().tick({"batch_size": None, "sleep": None})
+        self.assertEqual(close.call_count, 2)
+
+    def test_command_runs_once_and_reports_stats(self):
+        out = StringIO()
+        call_command("cleanup", "--job", "sessions", stdout=out)
+        self.assertIn("sessions: deleted 5 rows", out.getvalue())
+        out = StringIO()
+        call_command("cleanup", "--stats", stdout=out)
+        self.assertIn("5 total", out.getvalue())
+        self.assertIn("admin_log: never run", out.getvalue())
+
+
+@override_settings(
+    REQUEST_PROFILING=True, PROFILE_SAMPLE_RATE=0, PROFILE_PATHS=[],
+    PROFILE_TOKEN="let-me-profile", PROFILE_KEEP=2,
+)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        profile_dir = override_settings(PROFILE_DIR=tmp.name)
+        profile_dir.enable()
+        self.addCleanup(profile_dir.disable)
+        self.store = ProfileStore(tmp.name, 2)
+        User.objects.create_user(email="erin@gmail.com", password="s3cret-pass")
+
+    def login(self, **headers):
+        return APIClient().post(
+            "/auth/login/", {"email": "erin@gmail.com", "password": "s3cret-pass"}, headers=headers
+        )
+
+    def test_unsampled_request_is_not_profiled(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(self.store.list(), [])
+
+    def test_header_with_token_captures_profile_and_queries(self):
+        self.assertEqual(self.login(**{"X-Profile": "wrong"}).get("X-Profile-Id"), None)
+        response = self.login(**{"X-Profile": "let-me-profile"})
+        meta, prof_path = self.store.load(response["X-Profile-Id"])
+        self.assertEqual((meta["path"], meta["status"]), ("/auth/login/", 200))
+        self.assertGreaterEqual(meta["query_count"], 1)
+        self.assertIn("auth_app_user", meta["queries"][0]["sql"])
+        self.assertTrue(prof_path.exists())
+
+    def test_configured_path_is_always_profiled(self):
+        with self.settings(PROFILE_PATHS=["/auth/login/"]):
+            self.assertIn("X-Profile-Id", self.login())
+
+    def test_busy_profiler_serves_request_unprofiled(self):
+        import cProfile
+
+        with mock.patch.object(
+            cProfile.Profile, "enable", side_effect=ValueError("Another profiling tool is already active")
+        ):
+            response = self.login(**{"X-Profile": "let-me-profile"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(self.store.list(), [])
+
+    def test_unwritable_profile_dir_does_not_fail_request(self):
+        blocker = self.store.directory / "not-a-dir"
+        blocker.write_text("")
+        with self.settings(PROFILE_DIR=str(blocker / "profiles")), \
+                self.assertLogs("auth_app.middleware", "ERROR"):
+            response = self.login(**{"X-Profile": "let-me-profile"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_store_with_keep_zero_stores_nothing(self):
+        self.assertFalse(ProfileStore(self.store.directory, 0).qualifies(1000))
+
+    def test_store_keeps_slowest_profiles(self):
+        import cProfile
+
+        for duration in (5, 30, 10, 1):
+            if self.store.qualifies(duration):
+                self.store.save(cProfile.Profile(), {"duration_ms": duration})
+        self.assertEqual([p["duration_ms"] for p in self.store.list()], [30, 10])
+        self.assertEqual(len(os.listdir(self.store.directory)), 4)
+
+    def test_profiles_command_lists_and_dumps(self):
+        profile_id = self.login(**{"X-Profile": "let-me-profile"})["X-Profile-Id"]
+        out = StringIO()
+        call_command("profiles", stdout=out)
+        self.assertIn(f"POST /auth/login/  {profile_id}", out.getvalue())
+        out = StringIO()
+        call_command("profiles", profile_id, "--limit", "5", stdout=out)
+        self.assertIn("function calls", out.getvalue())
+        self.assertIn("auth_app_user", out.getvalue())
@@ -2,7 +2,8 @@ from django.urls import path
 from .views import (
     RegisterView, LoginView, MFASetupView, MFAVerifyView,
     MFASendOTPView, TokenRefreshView, LogoutView, RequestPasswordResetView,
-    ConfirmPasswordResetView,
+    ConfirmPasswordResetView, WebAuthnRegisterOptionsView, WebAuthnRegisterVerifyView,
+    WebAuthnAuthenticateOptionsView, WebAuthnAuthenticateVerifyView,
 )
 
 urlpatterns = [
@@ -11,6 +12,10 @@ urlpatterns = [
     path("mfa/setup/", MFASetupView.as_view()),
     path("mfa/verify/", MFAVerifyView.as_view()),
     path("mfa/send-otp/", MFASendOTPView.as_view()),
+    path("mfa/webauthn/register/options/", WebAuthnRegisterOptionsView.as_view()),
+    path("mfa/webauthn/register/verify/", WebAuthnRegisterVerifyView.as_view()),
+    path("mfa/webauthn/authenticate/options/", WebAuthnAuthenticateOptionsView.as_view()),
+    path("mfa/webauthn/authenticate/verify/", WebAuthnAuthenticateVerifyView.as_view()),
     path("token/refresh/", TokenRefreshView.as_view()),
     path("logout/", LogoutView.as_view()),
     path("reset-password/request/", RequestPasswordResetView.as_view()),
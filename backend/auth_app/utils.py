@@ -1,21 +1,23 @@
 # backend/auth_app/utils.py
-import pyotp
-import qrcode
+# pyotp, qrcode (which pulls in Pillow) and the mail stack are imported where
+# they are used, so worker boot and management commands don't pay for them.
 import io
 import base64
-from django.core.mail import send_mail
 from django.conf import settings
 
 def generate_mfa_secret():
     """
     Generate a base32 secret suitable for TOTP authenticator apps.
     """
+    import pyotp
     return pyotp.random_base32()
 
 def generate_qr_code_base64(user_email, secret, issuer_name="MFA Auth"):
     """
     Return a data URI (PNG) with QR code of provisioning URI for authenticator apps.
     """
+    import pyotp
+    import qrcode
     provisioning_uri = pyotp.totp.TOTP(secret).provisioning_uri(name=user_email, issuer_name=issuer_name)
     # generate QR code image
     qr = qrcode.QRCode(box_size=6, border=2)
@@ -32,6 +34,7 @@ def verify_totp(secret, token):
     """
     Verify TOTP token. Returns True/False.
     """
+    import pyotp
     try:
         totp = pyotp.TOTP(secret)
         return totp.verify(token, valid_window=1)  # allow 1-step window
@@ -42,6 +45,7 @@ def send_otp_email(to_email, otp, subject="Your OTP Code"):
     """
     Send plain OTP email using Django's send_mail. Ensure EMAIL_* settings are configured.
     """
+    from django.core.mail import send_mail
     try:
         send_mail(
             subject,
@@ -1,11 +1,11 @@
 import os, uuid
-import jwt
+import json
 import random
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
 from django.contrib.auth import logout
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from rest_framework import status
@@ -13,12 +13,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from . import routers
 from .authentication import CustomJWTAuthentication
 from .serializers import (
     RegisterSerializer, LoginSerializer, MFAVerifySerializer,
     RequestPasswordResetSerializer, ConfirmPasswordResetSerializer,
+    WebAuthnVerifySerializer, WebAuthnRegisterSerializer,
 )
 from .models import User
+from .passkeys import (
+    PasskeyError, registration_options, verify_registration,
+    authentication_options, verify_authentication,
+)
 from .utils import (
     generate_mfa_secret, generate_qr_code_base64, verify_totp,
     send_otp_email
@@ -34,6 +40,8 @@ REFRESH_TOKEN_LIFETIME = int(os.getenv("JWT_REFRESH_TOKEN_LIFETIME", 3600))   #
 
 def create_jwt(user: User, token_type: str = "access") -> str:
     """Create access or refresh token."""
+    import jwt  # deferred: PyJWT loads cryptography when it is installed
+
     lifetime = ACCESS_TOKEN_LIFETIME if token_type == "access" else REFRESH_TOKEN_LIFETIME
     payload = {
         "user_id": user.id,
@@ -50,6 +58,8 @@ def create_jwt(user: User, token_type: str = "access") -> str:
 
 def decode_jwt(token: str):
     """Decode JWT and handle expiry/invalid errors."""
+    import jwt
+
     try:
         return jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
     except jwt.ExpiredSignatureError:
@@ -112,6 +122,7 @@ class TokenRefreshView(APIView):
         if decoded.get("type") != "refresh":
             return Response({"error": "Not a refresh token"}, status=status.HTTP_400_BAD_REQUEST)
 
+        routers.pin_if_user_pinned(decoded.get("user_id"))
         try:
             user = User.objects.get(pk=decoded.get("user_id"))
         except User.DoesNotExist:
@@ -136,7 +147,11 @@ class LogoutView(APIView):
 # ==============================================================
 
 class MFASetupView(APIView):
-    """Generate MFA secret and QR code for TOTP. Requires authenticated user."""
+    """
+    Generate MFA secret and QR code for TOTP. Requires authenticated user.
+    Once MFA is enabled the secret is never shown again: a password-only
+    token could otherwise read it and mint TOTP codes.
+    """
     authentication_classes = [CustomJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
@@ -146,6 +161,12 @@ class MFASetupView(APIView):
         if not user or not user.is_authenticated:
             return Response({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
 
+        if user.mfa_enabled:
+            return Response(
+                {"error": "MFA is already enabled", "mfa_enabled": True},
+                status=status.HTTP_409_CONFLICT,
+            )
+
         if not user.mfa_secret:
             user.mfa_secret = generate_mfa_secret()
             user.save()
@@ -197,6 +218,104 @@ class MFASendOTPView(APIView):
         return Response({"error": "Failed to send OTP email"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# ==============================================================
+#                    WEBAUTHN / PASSKEY MFA
+# ==============================================================
+
+class WebAuthnRegisterOptionsView(APIView):
+    """Return PublicKeyCredentialCreationOptions for navigator.credentials.create()."""
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response(json.loads(registration_options(request.user)))
+
+
+class WebAuthnRegisterVerifyView(APIView):
+    """
+    Verify the attestation, store the passkey and enable MFA.
+    Once MFA is enabled, the request must also carry a TOTP code ("totp") or
+    an assertion from an existing passkey ("assertion"), so a password alone
+    can't enroll a new authenticator.
+    """
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WebAuthnRegisterSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        if user.mfa_enabled and not self.proves_existing_factor(user, serializer.validated_data):
+            return Response(
+                {"error": "MFA is enabled: confirm with a TOTP code or an existing passkey"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        try:
+            credential = verify_registration(
+                user, serializer.validated_data["credential"], serializer.validated_data["name"]
+            )
+        except PasskeyError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user.mfa_enabled:
+            user.mfa_enabled = True
+            user.save(update_fields=["mfa_enabled"])
+        publish_to_user_event(user.email, "passkey_registered", {"user_id": user.id})
+        return Response(
+            {"message": "Passkey registered successfully", "credential_id": credential.credential_id},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def proves_existing_factor(self, user, data):
+        if data.get("totp") and user.mfa_secret and verify_totp(user.mfa_secret, data["totp"]):
+            return True
+        if data.get("assertion"):
+            try:
+                verify_authentication(user, data["assertion"])
+                return True
+            except PasskeyError:
+                return False
+        return False
+
+
+class WebAuthnAuthenticateOptionsView(APIView):
+    """Return PublicKeyCredentialRequestOptions for navigator.credentials.get()."""
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            return Response(json.loads(authentication_options(request.user)))
+        except PasskeyError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class WebAuthnAuthenticateVerifyView(APIView):
+    """Verify a passkey assertion as the second factor."""
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WebAuthnVerifySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        try:
+            verify_authentication(user, serializer.validated_data["credential"])
+        except PasskeyError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user.mfa_enabled:
+            user.mfa_enabled = True
+            user.save(update_fields=["mfa_enabled"])
+        publish_to_user_event(user.email, "mfa_verified", {"user_id": user.id, "method": "webauthn"})
+        return Response({"message": "MFA verified successfully"})
+
+
 # ==============================================================
 #                    PASSWORD RESET FLOW
 # ==============================================================
@@ -209,6 +328,7 @@ class RequestPasswordResetView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         email = serializer.validated_data["email"].lower()
+        routers.pin_if_email_pinned(email)
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
@@ -220,6 +340,8 @@ class RequestPasswordResetView(APIView):
         frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
         reset_link = f"{frontend_url}/reset-password?uid={uid}&token={token}"
 
+        from django.core.mail import send_mail
+
         try:
             send_mail(
                 "Password reset request",
@@ -247,7 +369,8 @@ class ConfirmPasswordResetView(APIView):
 
         try:
             uid = force_str(urlsafe_base64_decode(uidb64))
-            user = User.objects.get(pk=uid)
+            # The token is checked against the password hash: never use a stale replica copy.
+            user = User.objects.using(DEFAULT_DB_ALIAS).get(pk=uid)
         except Exception:
             return Response({"error": "Invalid reset link"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -26,6 +26,11 @@ const MFASetup: React.FC = () => {
           throw new Error("QR data not found in response");
         }
       } catch (err: any) {
+        // MFA already enabled: the secret isn't shown again, go verify instead.
+        if (err.response?.data?.mfa_enabled) {
+          navigate("/mfa-verify");
+          return;
+        }
         console.error("MFA setup error:", err);
         setError("Failed to setup MFA. Please login again or check server.");
       } finally {